@@ -0,0 +1,81 @@
+"""Module that lists and extracts the packed archives created with --packed.
+
+Members are located through the index stored next to each archive, so listing an
+archive or extracting a single file does not require scanning the whole archive. The
+tar headers are scanned instead when the index is missing or does not cover the whole
+archive, e.g. while a download is still appending to it. Archives are never modified.
+
+Usage:
+    To list the members of an archive:
+    python archiver.py list <archive>
+
+    To extract all members, or only the given ones, to a directory:
+    python archiver.py extract <archive> [<member> ...] [--output <directory>]
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+from src.archive_utils import extract_members, read_entries
+from src.config import DOWNLOAD_FOLDER
+
+
+def list_archive(archive_path: Path) -> None:
+    """Print the size and name of each member of an archive."""
+    for entry in read_entries(archive_path):
+        print(f"{entry['size']:>12}  {entry['name']}")  # noqa: T201
+
+
+def extract_archive(
+    archive_path: Path, output_dir: Path, names: list[str] | None = None,
+) -> None:
+    """Extract the members of an archive and report the missing ones."""
+    extracted = extract_members(archive_path, output_dir, names)
+    for name in set(names or []) - set(extracted):
+        log_message = f"Member not found in {archive_path}: {name}"
+        logging.warning(log_message)
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse the command-line arguments."""
+    parser = argparse.ArgumentParser(description="List or extract packed archives.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="List the archive members.")
+    list_parser.add_argument("archive", type=Path, help="Path of the archive.")
+
+    extract_parser = subparsers.add_parser("extract", help="Extract archive members.")
+    extract_parser.add_argument("archive", type=Path, help="Path of the archive.")
+    extract_parser.add_argument(
+        "members", nargs="*", help="Members to extract, all of them if omitted.",
+    )
+    extract_parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help="Output directory, defaults to a folder named after the archive.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Run the script."""
+    args = parse_arguments()
+
+    if not args.archive.is_file():
+        log_message = f"Archive not found: {args.archive}"
+        logging.error(log_message)
+        sys.exit(1)
+
+    if args.command == "list":
+        list_archive(args.archive)
+
+    else:
+        output_dir = args.output or Path(DOWNLOAD_FOLDER) / args.archive.stem
+        extract_archive(args.archive, output_dir, args.members or None)
+
+
+if __name__ == "__main__":
+    main()
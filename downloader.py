@@ -5,28 +5,39 @@ It uses asynchronous HTTP requests with `aiohttp` for efficient file downloading
 
 Usage:
     To run the script, execute with a URL as an argument:
-    python script.py <url>
+    python script.py <url> [--profile] [--headless] [--status-interval SECONDS]
+                            [--packed]
 """
 
+import argparse
 import asyncio
 import random
-import sys
+from contextlib import nullcontext
+from pathlib import Path
 
 from aiohttp import ClientSession
 from bs4 import BeautifulSoup
-from rich.live import Live
-from rich.progress import Progress
 
-from src.config import TIMEOUT
+from src.archive_utils import PackedArchive
+from src.config import ARCHIVE_SUFFIX, HEADLESS_STATUS_INTERVAL, TIMEOUT
 from src.download_utils import save_file_with_progress
 from src.file_utils import create_download_directory, move_files
 from src.general_utils import clear_terminal, fetch_page
-from src.progress_utils import create_progress_bar, create_progress_table
+from src.profiling_utils import profile_run
+from src.progress_utils import (
+    HeadlessProgress,
+    TransferProgress,
+    create_progress_bar,
+    create_progress_display,
+)
 from src.rule34_utils import generate_page_urls, get_download_links, get_tag_name
 
 
 async def download_video_items(
-    video_download_links: list[str], download_path: str, task_info: tuple,
+    video_download_links: list[str],
+    download_path: str,
+    task_info: tuple,
+    archive: PackedArchive | None = None,
 ) -> None:
     """Download video files with progress tracking."""
     async with ClientSession(timeout=TIMEOUT) as session:
@@ -36,6 +47,7 @@ async def download_video_items(
                 video_download_link,
                 download_path,
                 task_info,
+                archive=archive,
             )
 
 
@@ -44,6 +56,7 @@ async def download_items(
     video_download_links: list[str],
     download_path: str,
     task_info: tuple,
+    archive: PackedArchive | None = None,
 ) -> None:
     """Download multiple video files with progress tracking."""
     job_progress, task_title = task_info
@@ -57,6 +70,7 @@ async def download_items(
                 download_link,
                 download_path,
                 (job_progress, task),
+                archive=archive,
             )
             for download_link in download_links
             if download_link
@@ -68,13 +82,17 @@ async def download_items(
             video_download_links,
             download_path,
             (job_progress, task),
+            archive,
         )
 
     job_progress.update(task, visible=False)
 
 
 async def process_and_download_items(
-    soup: BeautifulSoup, download_path: str, task_info: tuple,
+    soup: BeautifulSoup,
+    download_path: str,
+    task_info: tuple,
+    archive: PackedArchive | None = None,
 ) -> None:
     """Process and downloads video items and preview images."""
 
@@ -87,14 +105,17 @@ async def process_and_download_items(
     )
     download_links = await get_download_links(preview_images)
     video_download_links = pop_video_download_links(download_links)
-    await download_items(download_links, video_download_links, download_path, task_info)
+    await download_items(
+        download_links, video_download_links, download_path, task_info, archive,
+    )
 
 
 async def download_pages(
     page_urls: list[str],
     initial_soup: BeautifulSoup,
     download_path: str,
-    job_progress: Progress,
+    job_progress: TransferProgress | HeadlessProgress,
+    archive: PackedArchive | None = None,
 ) -> None:
     """Download pages and process video items and images."""
 
@@ -109,33 +130,95 @@ async def download_pages(
         task_title = f"Page {indx + 1}/{num_pages}"
         page_soup = fetch_page_soup(page_url)
         await process_and_download_items(
-            page_soup, download_path, (job_progress, task_title),
+            page_soup, download_path, (job_progress, task_title), archive,
         )
         job_progress.advance(overall_task)
-        move_files(download_path)
+        if archive is None:
+            move_files(download_path)
         await asyncio.sleep(random.uniform(3, 5))  # noqa: S311
 
 
-async def process_tag_download(url: str) -> None:
-    """Process and download items for a given tag from a URL."""
+async def process_tag_download(
+    url: str,
+    *,
+    headless: bool = False,
+    status_interval: float = HEADLESS_STATUS_INTERVAL,
+    packed: bool = False,
+) -> None:
+    """Process and download items for a given tag from a URL.
+
+    If packed is set, the items are appended to a per-tag archive in the download
+    folder instead of being written to a per-tag directory.
+    """
     tag_name = get_tag_name(url)
-    download_path = create_download_directory(tag_name)
+    # Packed archives are stored directly in the download folder
+    download_path = create_download_directory("" if packed else tag_name)
 
     initial_soup, last_page_url = fetch_page(url, get_last_page=True)
     page_urls = generate_page_urls(url, last_page_url)
 
-    job_progress = create_progress_bar()
-    progress_table = create_progress_table(tag_name, job_progress)
+    job_progress = create_progress_bar(
+        headless=headless, status_interval=status_interval,
+    )
+    archive = (
+        PackedArchive(Path(download_path) / f"{tag_name}{ARCHIVE_SUFFIX}")
+        if packed
+        else None
+    )
+
+    async with archive or nullcontext():
+        with create_progress_display(tag_name, job_progress):
+            await download_pages(
+                page_urls, initial_soup, download_path, job_progress, archive,
+            )
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Download media for a rule34 tag.")
+    parser.add_argument("url", help="URL of the tag to download.")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the run and record event-loop lag and slow callbacks.",
+    )
+    add_output_arguments(parser)
+    return parser.parse_args()
+
 
-    with Live(progress_table, refresh_per_second=10):
-        await download_pages(page_urls, initial_soup, download_path, job_progress)
+def add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments controlling the progress display and the output format."""
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Print periodic status lines instead of the live progress display.",
+    )
+    parser.add_argument(
+        "--status-interval",
+        type=float,
+        default=HEADLESS_STATUS_INTERVAL,
+        help="Seconds between headless status lines, 0 disables them.",
+    )
+    parser.add_argument(
+        "--packed",
+        action="store_true",
+        help="Append downloads to a per-tag tar archive instead of separate files.",
+    )
 
 
 async def main() -> None:
     """Run the script."""
-    clear_terminal()
-    url = sys.argv[1]
-    await process_tag_download(url)
+    args = parse_arguments()
+    if not args.headless:
+        clear_terminal()
+
+    download = process_tag_download(
+        args.url,
+        headless=args.headless,
+        status_interval=args.status_interval,
+        packed=args.packed,
+    )
+    await (profile_run("downloader", download) if args.profile else download)
 
 
 if __name__ == "__main__":
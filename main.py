@@ -10,31 +10,59 @@ Usage:
         1. Read the URLs from 'URLs.txt'.
         2. Process each URL for downloading media content.
         3. Clear the contents of 'URLs.txt' after all URLs have been processed.
+
+    Pass --profile to write a cProfile report, event-loop lag samples and slow
+    callbacks for the run to the 'Profiles' directory, and --headless to replace the
+    live progress display with periodic status lines for batch and server runs.
+    Pass --packed to store each tag in a single tar archive, see 'archiver.py'.
 """
 
+import argparse
 import asyncio
 import sys
 
-from downloader import process_tag_download
+from downloader import add_output_arguments, process_tag_download
 from src.config import URLS_FILE
 from src.file_utils import read_file, write_file
 from src.general_utils import clear_terminal
+from src.profiling_utils import profile_run
 
 
-async def process_urls(urls: list[str]) -> None:
+async def process_urls(urls: list[str], args: argparse.Namespace) -> None:
     """Validate and downloads items for a list of URLs."""
     for url in urls:
-        await process_tag_download(url)
+        await process_tag_download(
+            url,
+            headless=args.headless,
+            status_interval=args.status_interval,
+            packed=args.packed,
+        )
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Download media for URLs in a file.")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the run and record event-loop lag and slow callbacks.",
+    )
+    add_output_arguments(parser)
+    return parser.parse_args()
 
 
 async def main() -> None:
     """Run the script."""
+    args = parse_arguments()
+
     # Clear the terminal
-    clear_terminal()
+    if not args.headless:
+        clear_terminal()
 
     # Read and process URLs, ignoring empty lines
     urls = [url.strip() for url in read_file(URLS_FILE) if url.strip()]
-    await process_urls(urls)
+    download = process_urls(urls, args)
+    await (profile_run("main", download) if args.profile else download)
 
     # Clear URLs file
     write_file(URLS_FILE)
@@ -4,10 +4,12 @@ These utilities include functions for downloading, file management, URL handling
 progress tracking, and more.
 
 Modules:
+    - archive_utils: Append-only tar archives for the packed output mode.
     - config: Constants and settings used across the project.
     - download_utils: Functions for handling downloads.
     - file_utils: Utilities for managing file operations.
     - general_utils: Miscellaneous utility functions.
+    - profiling_utils: Opt-in profiling hooks and event-loop lag monitoring.
     - progress_utils: Tools for progress tracking and reporting.
     - rule34_utils: Specific functions for handling Rule 34-related tasks.
     - url_utils: Functions for parsing, reconstructing, and manipulating URLs.
@@ -19,10 +21,12 @@ easily imported and used across different parts of the application.
 # src/__init__.py
 
 __all__ = [
+    "archive_utils",
     "config",
     "download_utils",
     "file_utils",
     "general_utils",
+    "profiling_utils",
     "progress_utils",
     "rule34_utils",
     "url_utils",
@@ -0,0 +1,315 @@
+"""Module that provides append-only tar archives for packed download output.
+
+Downloaded bodies are appended as members of a single per-tag tar archive instead of
+being written as individual files. Every member is recorded in a JSON Lines index next
+to the archive, holding its data offset and size for random access. The index line is
+only written once the member data has been flushed. When the archive is reopened for
+appending, an index that does not cover the whole archive is rebuilt from the tar
+headers, and only an incomplete trailing member is discarded. Readers never modify
+the archive.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import tarfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
+
+import aiofiles
+
+from .config import ARCHIVE_INDEX_SUFFIX, CHUNK_SIZE
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+    from types import TracebackType
+
+BLOCK_SIZE = tarfile.BLOCKSIZE
+
+
+def get_index_path(archive_path: Path) -> Path:
+    """Return the path of the index file belonging to an archive."""
+    return archive_path.with_name(archive_path.name + ARCHIVE_INDEX_SUFFIX)
+
+
+def get_padded_size(size: int) -> int:
+    """Round a member size up to the next multiple of the tar block size."""
+    return -(-size // BLOCK_SIZE) * BLOCK_SIZE
+
+
+def parse_index(archive_path: Path) -> tuple[list[dict], bool]:
+    """Parse the index of an archive, stopping at the first malformed line.
+
+    Return the parsed entries and whether the whole index could be parsed.
+    """
+    index_path = get_index_path(archive_path)
+    if not index_path.exists():
+        return [], False
+
+    entries = []
+    with index_path.open("r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                entries.append(json.loads(line))
+
+            except json.JSONDecodeError:
+                return entries, False
+
+    return entries, True
+
+
+def get_end_offset(entries: list[dict]) -> int:
+    """Return the offset right after the last indexed member."""
+    if not entries:
+        return 0
+
+    return entries[-1]["offset"] + get_padded_size(entries[-1]["size"])
+
+
+def get_indexed_entries(archive_path: Path, archive_size: int) -> list[dict]:
+    """Return the leading index entries whose data is fully present in the archive."""
+    entries, _ = parse_index(archive_path)
+
+    valid_entries = []
+    for entry in entries:
+        if entry["offset"] + get_padded_size(entry["size"]) > archive_size:
+            break
+        valid_entries.append(entry)
+
+    return valid_entries
+
+
+def scan_archive(archive_path: Path) -> tuple[list[dict], int]:
+    """Scan the tar headers of an archive, stopping at the first incomplete member.
+
+    Return the entries of the complete file members and the offset right after the
+    last complete member.
+    """
+    archive_size = archive_path.stat().st_size
+    entries = []
+    end_offset = 0
+
+    try:
+        with tarfile.open(archive_path, "r:") as tar:
+            while (member := tar.next()) is not None:
+                member_end = member.offset_data + get_padded_size(member.size)
+                if member_end > archive_size:
+                    break
+
+                if member.isfile():
+                    entries.append(
+                        {
+                            "name": member.name,
+                            "offset": member.offset_data,
+                            "size": member.size,
+                        },
+                    )
+                end_offset = member_end
+
+    except tarfile.ReadError:
+        # Raised for an empty archive or a truncated first header
+        pass
+
+    return entries, end_offset
+
+
+def write_index(archive_path: Path, entries: list[dict]) -> None:
+    """Write the index of an archive through a temporary file."""
+    index_path = get_index_path(archive_path)
+    temp_path = index_path.with_name(index_path.name + ".tmp")
+    with temp_path.open("w", encoding="utf-8") as file:
+        file.writelines(f"{json.dumps(entry)}\n" for entry in entries)
+    temp_path.replace(index_path)
+
+
+def read_entries(archive_path: Path) -> list[dict]:
+    """Read the members of an archive without modifying it.
+
+    The index is used when it covers the whole archive, otherwise the tar headers are
+    scanned, e.g. for plain tar files or while a download is appending to the archive.
+    """
+    archive_size = archive_path.stat().st_size
+    entries = get_indexed_entries(archive_path, archive_size)
+
+    if get_end_offset(entries) < archive_size:
+        entries, _ = scan_archive(archive_path)
+
+    return entries
+
+
+def recover_archive(archive_path: Path) -> list[dict]:
+    """Make an archive and its index consistent before appending to it.
+
+    When the index is missing, malformed or does not cover the whole archive, it is
+    rebuilt from the tar headers, and only the bytes following the last complete member
+    are discarded.
+    """
+    if not archive_path.exists():
+        return []
+
+    archive_size = archive_path.stat().st_size
+    entries, complete = parse_index(archive_path)
+    valid_entries = get_indexed_entries(archive_path, archive_size)
+
+    if (
+        complete
+        and len(valid_entries) == len(entries)
+        and get_end_offset(valid_entries) == archive_size
+    ):
+        return valid_entries
+
+    entries, end_offset = scan_archive(archive_path)
+    if archive_size > end_offset:
+        discarded = archive_size - end_offset
+        log_message = f"Discarding {discarded} trailing bytes from {archive_path}"
+        logging.warning(log_message)
+        with archive_path.open("r+b") as file:
+            file.truncate(end_offset)
+
+    write_index(archive_path, entries)
+    return entries
+
+
+def create_member_header(name: str, size: int) -> bytes:
+    """Create the tar header of a regular file member."""
+    tar_info = tarfile.TarInfo(name)
+    tar_info.size = size
+    tar_info.mtime = int(time.time())
+    tar_info.mode = 0o644
+    return tar_info.tobuf(format=tarfile.PAX_FORMAT)
+
+
+class PackedArchive:
+    """Append-only tar archive with an index for random access to its members."""
+
+    def __init__(self, archive_path: Path) -> None:
+        """Initialize the archive located at the given path."""
+        self.archive_path = Path(archive_path)
+        self.index_path = get_index_path(self.archive_path)
+        self.members: set[str] = set()
+        self._size = 0
+        self._lock = asyncio.Lock()
+        self._archive_file = None
+        self._index_file = None
+
+    async def __aenter__(self) -> PackedArchive:
+        """Recover the archive and open it for appending."""
+        entries = recover_archive(self.archive_path)
+        self.members = {entry["name"] for entry in entries}
+        self._size = (
+            self.archive_path.stat().st_size if self.archive_path.exists() else 0
+        )
+        self._archive_file = await aiofiles.open(self.archive_path, "ab")
+        self._index_file = await aiofiles.open(self.index_path, "a", encoding="utf-8")
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the archive and its index."""
+        await self._archive_file.close()
+        await self._index_file.close()
+
+    def __contains__(self, name: str) -> bool:
+        """Check whether a member with the given name is already archived."""
+        return name in self.members
+
+    async def append(self, name: str, data: bytes) -> int:
+        """Append a member held in memory and return the number of bytes stored."""
+
+        async def chunks() -> AsyncIterator[bytes]:
+            yield data
+
+        return await self.append_stream(name, chunks(), len(data))
+
+    async def append_stream(
+        self, name: str, chunks: AsyncIterator[bytes], size: int,
+    ) -> int:
+        """Stream a member of known size into the archive and record it in the index.
+
+        Return the number of bytes stored, which is zero if the name is already
+        archived. If the stream fails or does not match the size, the partial member is
+        removed from the archive.
+        """
+        async with self._lock:
+            if name in self.members:
+                return 0
+
+            start_offset = self._size
+            header = create_member_header(name, size)
+            written = 0
+
+            try:
+                await self._archive_file.write(header)
+                async for chunk in chunks:
+                    written += len(chunk)
+                    if written > size:
+                        break
+                    await self._archive_file.write(chunk)
+
+                if written != size:
+                    error_message = f"Expected {size} bytes for {name}, got {written}"
+                    raise ValueError(error_message)
+
+            except BaseException:
+                await self._archive_file.truncate(start_offset)
+                raise
+
+            padding = b"\0" * (get_padded_size(size) - size)
+            await self._archive_file.write(padding)
+            await self._archive_file.flush()
+            self._size = start_offset + len(header) + size + len(padding)
+
+            entry = {"name": name, "offset": start_offset + len(header), "size": size}
+            await self._index_file.write(f"{json.dumps(entry)}\n")
+            await self._index_file.flush()
+            self.members.add(name)
+            return size
+
+
+def copy_member(archive_file: BinaryIO, entry: dict, output_file: BinaryIO) -> None:
+    """Copy the data of a single member to a file in chunks using its index entry."""
+    archive_file.seek(entry["offset"])
+    remaining = entry["size"]
+
+    while remaining:
+        chunk = archive_file.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            error_message = f"Unexpected end of archive in {entry['name']}"
+            raise EOFError(error_message)
+
+        output_file.write(chunk)
+        remaining -= len(chunk)
+
+
+def extract_members(
+    archive_path: Path, output_dir: Path, names: list[str] | None = None,
+) -> list[str]:
+    """Extract the given members, or all of them, and return the extracted names."""
+    output_dir = Path(output_dir).resolve()
+    entries = [
+        entry for entry in read_entries(Path(archive_path))
+        if names is None or entry["name"] in names
+    ]
+
+    extracted = []
+    with Path(archive_path).open("rb") as archive_file:
+        for entry in entries:
+            target_path = (output_dir / entry["name"]).resolve()
+            if not target_path.is_relative_to(output_dir):
+                log_message = f"Skipping unsafe member name: {entry['name']}"
+                logging.warning(log_message)
+                continue
+
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+            with target_path.open("wb") as output_file:
+                copy_member(archive_file, entry, output_file)
+            extracted.append(entry["name"])
+
+    return extracted
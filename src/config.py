@@ -11,6 +11,7 @@ from aiohttp import ClientTimeout
 # ============================
 DOWNLOAD_FOLDER = "Downloads"  # The folder where downloaded files will be stored.
 URLS_FILE = "URLs.txt"         # The file containing the list of URLs to process.
+PROFILES_FOLDER = "Profiles"   # The folder where profiling results will be stored.
 
 # ============================
 # Media Configuration
@@ -32,6 +33,10 @@ EXTENSIONS_TO_DIR = {
     (".gif", ".webp"): GIFS_DIR,
 }
 
+# Packed archive output
+ARCHIVE_SUFFIX = ".tar"          # Suffix of the per-tag archives.
+ARCHIVE_INDEX_SUFFIX = ".index"  # Suffix appended to an archive name for its index.
+
 # ============================
 # Download Settings
 # ============================
@@ -40,6 +45,8 @@ KB = 1024
 MB = 1024 * KB
 CHUNK_SIZE = 64 * KB    # Default chunk size for downloads (in bytes).
 MAX_FILE_SIZE = 5 * MB  # Maximum file size for downloads (in bytes).
+ARCHIVE_BUFFER_SIZE = MAX_FILE_SIZE  # Bodies up to this size are downloaded to memory
+                                     # before being archived (in bytes).
 
 # ============================
 # HTTP / Network Configuration
@@ -61,3 +68,17 @@ HEADERS = {
     ),
     "Connection": "keep-alive",
 }
+
+# ============================
+# Progress Settings
+# ============================
+HEADLESS_STATUS_INTERVAL = 30  # Interval between headless status lines (in seconds),
+                               # zero disables the status output.
+
+# ============================
+# Profiling Settings
+# ============================
+LAG_SAMPLE_INTERVAL = 0.1     # Interval between event-loop lag samples (in seconds).
+SLOW_CALLBACK_DURATION = 0.1  # Callbacks running longer than this are flagged
+                              # as slow (in seconds).
+PROFILE_STATS_LIMIT = 50      # Number of entries listed in the text profile report.
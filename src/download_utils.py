@@ -2,23 +2,42 @@
 
 This module provides asynchronous functions to download large files with progress
 tracking, handle sample file downloads, and write the content in chunks to avoid
-timeouts. It also includes automatic retries for failed downloads.
+timeouts, either to individual files or to a packed archive. It also includes automatic
+retries for failed downloads.
 """
 
 from __future__ import annotations
 
 import asyncio
 import random
+from contextlib import aclosing
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import aiofiles
 from aiohttp import ClientResponse, ClientSession
 
-from .config import CHUNK_SIZE, EXTENSIONS_WHITELIST, HEADERS, MAX_FILE_SIZE, TIMEOUT
+from .config import (
+    ARCHIVE_BUFFER_SIZE,
+    CHUNK_SIZE,
+    EXTENSIONS_WHITELIST,
+    HEADERS,
+    MAX_FILE_SIZE,
+    TIMEOUT,
+)
+from .file_utils import get_archive_member_name
 from .rule34_utils import construct_sample_download_link
 
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
 
-async def handle_large_file(download_info: tuple, task_info: tuple) -> bool:
+    from .archive_utils import PackedArchive
+    from .progress_utils import HeadlessProgress, TransferProgress
+
+
+async def handle_large_file(
+    download_info: tuple, task_info: tuple, archive: PackedArchive | None = None,
+) -> bool:
     """Handle the download of large files by converting them to sample files."""
     file_size, download_link, download_path = download_info
     job_progress, task = task_info
@@ -29,13 +48,21 @@ async def handle_large_file(download_info: tuple, task_info: tuple) -> bool:
     if file_size > MAX_FILE_SIZE and not_in_whitelist:
         sample_download_link = construct_sample_download_link(download_link)
         file_name = sample_download_link.split("/")[-1].split("?")[0]
-        final_path = Path(download_path) / file_name
+
+        if archive is not None and get_archive_member_name(file_name) in archive:
+            job_progress.advance(task)
+            return True
 
         async with (
             ClientSession(timeout=TIMEOUT) as session,
             session.get(sample_download_link, headers=HEADERS) as response,
         ):
-            await write_file_chunks(response, final_path)
+            await write_response(
+                response,
+                (download_path, file_name),
+                job_progress=job_progress,
+                archive=archive,
+            )
 
         job_progress.advance(task)
         return True
@@ -43,33 +70,121 @@ async def handle_large_file(download_info: tuple, task_info: tuple) -> bool:
     return False
 
 
+async def write_response(
+    response: ClientResponse,
+    file_info: tuple,
+    chunk_size: int | None = None,
+    job_progress: TransferProgress | HeadlessProgress | None = None,
+    archive: PackedArchive | None = None,
+) -> None:
+    """Write the content of a response to the download path or to an archive."""
+    download_path, file_name = file_info
+
+    if archive is not None:
+        await write_archive_member(
+            response, archive, file_name, chunk_size, job_progress,
+        )
+    else:
+        final_path = Path(download_path) / file_name
+        await write_file_chunks(response, final_path, chunk_size, job_progress)
+
+
 async def write_file_chunks(
     response: ClientResponse,
     final_path: str,
     chunk_size: int | None = None,
+    job_progress: TransferProgress | HeadlessProgress | None = None,
 ) -> None:
     """Write the content of a response to a file in chunks."""
-    async with aiofiles.open(final_path, "wb") as file:
-        chunk_iterator = (
-            response.content.iter_chunked(chunk_size)
-            if chunk_size
-            else response.content.iter_any()
-        )
-        async for chunk in chunk_iterator:
+    async with (
+        aiofiles.open(final_path, "wb") as file,
+        aclosing(iter_response_chunks(response, chunk_size, job_progress)) as chunks,
+    ):
+        async for chunk in chunks:
             await file.write(chunk)
 
 
+async def write_archive_member(
+    response: ClientResponse,
+    archive: PackedArchive,
+    file_name: str,
+    chunk_size: int | None = None,
+    job_progress: TransferProgress | HeadlessProgress | None = None,
+) -> None:
+    """Write the content of a response into an archive.
+
+    Bodies up to the buffer size are downloaded to memory first, so concurrent
+    downloads only hold the archive lock for the write itself. Larger bodies are
+    streamed into the archive under the lock. Since a tar header must hold the member
+    size, bodies of unknown length are always collected in memory.
+    """
+    member_name = get_archive_member_name(file_name)
+    content_length = (
+        None if response.headers.get("Content-Encoding") else response.content_length
+    )
+
+    async with aclosing(
+        iter_response_chunks(response, chunk_size, job_progress),
+    ) as chunks:
+        if content_length is not None and content_length > ARCHIVE_BUFFER_SIZE:
+            await archive.append_stream(member_name, chunks, content_length)
+        else:
+            data = bytearray()
+            async for chunk in chunks:
+                data.extend(chunk)
+            await archive.append(member_name, bytes(data))
+
+
+async def iter_response_chunks(
+    response: ClientResponse,
+    chunk_size: int | None = None,
+    job_progress: TransferProgress | HeadlessProgress | None = None,
+) -> AsyncIterator[bytes]:
+    """Iterate over the content of a response in chunks.
+
+    The bytes are reported to the progress tracker as they arrive, and withdrawn if the
+    body is not read to the end, so a download retried after a timeout is not counted
+    twice.
+    """
+    chunk_iterator = (
+        response.content.iter_chunked(chunk_size)
+        if chunk_size
+        else response.content.iter_any()
+    )
+    reported_bytes = 0
+
+    try:
+        async for chunk in chunk_iterator:
+            if job_progress is not None:
+                job_progress.advance_bytes(len(chunk))
+                reported_bytes += len(chunk)
+            yield chunk
+
+    except BaseException:
+        if job_progress is not None and reported_bytes:
+            job_progress.advance_bytes(-reported_bytes)
+        raise
+
+
 async def save_file_with_progress(
     session: ClientSession,
     download_link: str,
     download_path: str,
     task_info: tuple,
     retries: int = 5,
+    archive: PackedArchive | None = None,
 ) -> None:
-    """Download a file with progress tracking and retries on failure."""
+    """Download a file with progress tracking and retries on failure.
+
+    If an archive is provided, the file is appended to it instead of being written to
+    the download path, and files already present in the archive are skipped.
+    """
     job_progress, task = task_info
     file_name = download_link.split("/")[-1].split("?")[0]
-    final_path = Path(download_path) / file_name
+
+    if archive is not None and get_archive_member_name(file_name) in archive:
+        job_progress.advance(task)
+        return
 
     for attempt in range(retries):
         async with session.get(download_link, headers=HEADERS) as response:
@@ -78,9 +193,16 @@ async def save_file_with_progress(
                 file_handled = await handle_large_file(
                     (file_size, download_link, download_path),
                     (job_progress, task),
+                    archive,
                 )
                 if not file_handled:
-                    await write_file_chunks(response, final_path, chunk_size=CHUNK_SIZE)
+                    await write_response(
+                        response,
+                        (download_path, file_name),
+                        chunk_size=CHUNK_SIZE,
+                        job_progress=job_progress,
+                        archive=archive,
+                    )
                     job_progress.advance(task)
 
             except asyncio.TimeoutError:
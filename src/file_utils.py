@@ -43,6 +43,23 @@ def create_download_directory(directory_name: str) -> str:
     return download_path
 
 
+def get_target_dir(filename: str) -> str | None:
+    """Return the media subdirectory for a file based on its extension."""
+    file_extension = Path(filename).suffix.lower()
+
+    for extensions, dir_name in EXTENSIONS_TO_DIR.items():
+        if file_extension in extensions:
+            return dir_name
+
+    return None
+
+
+def get_archive_member_name(filename: str) -> str:
+    """Return the name under which a file is stored in a packed archive."""
+    target_dir = get_target_dir(filename)
+    return f"{target_dir}/{filename}" if target_dir else filename
+
+
 def move_files(source_dir: str) -> None:
     """Move files from the source directory to designated subdirectories."""
     for target_dir in [PICS_DIR, VIDEOS_DIR, GIFS_DIR]:
@@ -53,14 +70,7 @@ def move_files(source_dir: str) -> None:
         source_path = Path(source_dir) / filename
 
         if Path(source_path).is_file():
-            file_extension = Path(filename).suffix.lower()
-            target_dir = None
-
-            for extensions, dir_name in EXTENSIONS_TO_DIR.items():
-                if file_extension in extensions:
-                    target_dir = dir_name
-                    break
-
+            target_dir = get_target_dir(filename)
             if target_dir:
                 target_path = Path(source_dir) / target_dir / filename
                 shutil.move(source_path, target_path)
@@ -52,7 +52,13 @@ def fetch_page(url: str, *, get_last_page: bool = False) -> BeautifulSoup:
 
 
 def clear_terminal() -> None:
-    """Clear the terminal screen based on the operating system."""
+    """Clear the terminal screen based on the operating system.
+
+    Nothing is done when the output is not a terminal, e.g. under cron or in containers.
+    """
+    if not sys.stdout.isatty():
+        return
+
     commands = {
         "nt": "cls",       # Windows
         "posix": "clear",  # macOS and Linux
@@ -0,0 +1,310 @@
+"""Module that provides opt-in profiling hooks for diagnosing slow runs.
+
+It includes a cProfile wrapper around the whole run, covering the event loop thread and
+the threads started during the run, such as the rich refresh thread and the aiofiles
+workers. An event-loop lag monitor records how long the loop was late to wake up, and a
+watchdog reports the callbacks that blocked the loop along with the coroutine and the
+exact line responsible. Results are written as plain files so they can be diffed
+between runs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import pstats
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .config import (
+    LAG_SAMPLE_INTERVAL,
+    PROFILE_STATS_LIMIT,
+    PROFILES_FOLDER,
+    SLOW_CALLBACK_DURATION,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Coroutine
+
+ASYNCIO_DIR = Path(asyncio.__file__).parent
+
+
+class LoopLagMonitor:
+    """Periodically measure how late the event loop is in waking up a sleeper."""
+
+    def __init__(self, interval: float = LAG_SAMPLE_INTERVAL) -> None:
+        """Initialize the monitor with the given sampling interval."""
+        self.interval = interval
+        self.samples: list[tuple[float, float]] = []
+        self._task: asyncio.Task | None = None
+
+    async def _sample(self) -> None:
+        """Record the delay between the scheduled and the actual wake-up time."""
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - scheduled, 0.0)
+            self.samples.append((scheduled - start_time, lag))
+
+    def start(self) -> None:
+        """Start sampling in the background on the running loop."""
+        self._task = asyncio.create_task(self._sample(), name="loop-lag-monitor")
+
+    async def stop(self) -> None:
+        """Stop sampling and wait for the background task to finish."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+
+        except asyncio.CancelledError:
+            pass
+
+        self._task = None
+
+    def write_report(self, report_path: Path) -> None:
+        """Write the collected samples and a short summary to a CSV file."""
+        lags = sorted(lag for _, lag in self.samples) or [0.0]
+        p95_index = min(int(len(lags) * 0.95), len(lags) - 1)
+
+        with report_path.open("w", encoding="utf-8") as file:
+            file.write(f"# samples: {len(self.samples)}\n")
+            file.write(f"# mean: {sum(lags) / len(lags):.6f}\n")
+            file.write(f"# p95: {lags[p95_index]:.6f}\n")
+            file.write(f"# max: {lags[-1]:.6f}\n")
+            file.write("elapsed_s,lag_s\n")
+            for elapsed, lag in self.samples:
+                file.write(f"{elapsed:.3f},{lag:.6f}\n")
+
+
+class SlowCallbackMonitor:
+    """Time every callback run by the event loop and record the slow ones.
+
+    A watchdog thread samples the stack of the event loop thread while a callback runs
+    past the threshold, so the report shows the exact line that blocked the loop. This
+    does not need asyncio debug mode, which would slow down the whole profiled run.
+    """
+
+    def __init__(self, threshold: float = SLOW_CALLBACK_DURATION) -> None:
+        """Initialize the monitor with the given duration threshold."""
+        self.threshold = threshold
+        self.records: list[str] = []
+        self._original_run = None
+        self._loop_thread_id = threading.get_ident()
+        self._current: tuple[float, asyncio.Handle] | None = None
+        self._sampled: tuple[tuple, traceback.StackSummary] | None = None
+        self._stop_event = threading.Event()
+        self._watchdog = threading.Thread(
+            target=self._watch, name="slow-callback-watchdog", daemon=True,
+        )
+
+    def install(self) -> None:
+        """Wrap the callback runner of the event loop and start the watchdog."""
+        original_run = self._original_run = asyncio.events.Handle._run  # noqa: SLF001
+        monitor = self
+
+        def timed_run(handle: asyncio.Handle) -> None:
+            current = monitor._current = (time.perf_counter(), handle)  # noqa: SLF001
+            try:
+                original_run(handle)
+
+            finally:
+                duration = time.perf_counter() - current[0]
+                sampled = monitor._sampled  # noqa: SLF001
+                monitor._current = monitor._sampled = None  # noqa: SLF001
+                if duration >= monitor.threshold:
+                    stack = sampled[1] if sampled and sampled[0] is current else None
+                    monitor.record(handle, duration, stack)
+
+        asyncio.events.Handle._run = timed_run  # noqa: SLF001
+        self._watchdog.start()
+
+    def uninstall(self) -> None:
+        """Restore the original callback runner and stop the watchdog."""
+        self._stop_event.set()
+        self._watchdog.join()
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run  # noqa: SLF001
+            self._original_run = None
+
+    def _watch(self) -> None:
+        """Sample the loop thread stack once per callback exceeding the threshold."""
+        while not self._stop_event.wait(self.threshold / 4):
+            current, sampled = self._current, self._sampled
+            if current is None or (sampled is not None and sampled[0] is current):
+                continue
+
+            if time.perf_counter() - current[0] >= self.threshold:
+                frame = sys._current_frames().get(self._loop_thread_id)  # noqa: SLF001
+                if frame is not None:
+                    self._sampled = (current, traceback.extract_stack(frame))
+
+    def record(
+        self,
+        handle: asyncio.Handle,
+        duration: float,
+        stack: traceback.StackSummary | None,
+    ) -> None:
+        """Record a slow callback with its innermost coroutine and blocking line."""
+        callback = handle._callback  # noqa: SLF001
+        task = getattr(callback, "__self__", None)
+        description = (
+            f"{task.get_name()} {describe_coroutine(task.get_coro())}"
+            if isinstance(task, asyncio.Task)
+            else repr(callback)
+        )
+
+        if stack is not None:
+            frames = [frame for frame in stack if not is_internal_frame(frame.filename)]
+            location = "blocked at"
+        else:
+            # The callback ended between two samples, the task only tells where it is
+            # suspended now, which is usually the await following the blocking code
+            frames = (
+                get_suspended_frames(task) if isinstance(task, asyncio.Task) else []
+            )
+            location = "suspended at"
+
+        call_site = "".join(traceback.format_list(frames)) or "  <unknown>\n"
+        self.records.append(
+            f"Executing {description} took {duration:.3f} seconds, "
+            f"{location}:\n{call_site}",
+        )
+
+    def write_report(self, report_path: Path) -> None:
+        """Write the collected slow callbacks to a log file."""
+        with report_path.open("w", encoding="utf-8") as file:
+            file.write("\n".join(self.records))
+
+
+class ThreadProfilers:
+    """Profile every thread started while installed, e.g. rich and aiofiles workers.
+
+    cProfile only instruments the thread that enables it, so each new thread enables its
+    own profiler on its first profiling event. Threads started before installation are
+    not covered.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the collection with no profilers."""
+        self.profilers: list[cProfile.Profile] = []
+
+    def _start_profiler(self, *_: object) -> None:
+        """Enable a profiler for the calling thread, replacing this hook."""
+        profiler = cProfile.Profile()
+        self.profilers.append(profiler)
+        profiler.enable()
+
+    def install(self) -> None:
+        """Profile the threads started from now on."""
+        threading.setprofile(self._start_profiler)
+
+    def uninstall(self) -> None:
+        """Stop profiling newly started threads."""
+        threading.setprofile(None)
+
+
+def get_coroutine_chain(coro: Coroutine) -> list[Coroutine]:
+    """Follow the awaited coroutines from the outermost to the innermost one."""
+    chain = []
+    while coro is not None and getattr(coro, "cr_frame", None) is not None:
+        chain.append(coro)
+        coro = coro.cr_await
+
+    return chain
+
+
+def describe_coroutine(coro: Coroutine) -> str:
+    """Describe the innermost user coroutine awaited by the given one."""
+    chain = [
+        awaited for awaited in get_coroutine_chain(coro)
+        if not is_internal_frame(awaited.cr_frame.f_code.co_filename)
+    ]
+    if not chain:
+        return f"{coro.__qualname__}()"
+
+    innermost = chain[-1]
+    frame = innermost.cr_frame
+    return f"{innermost.__qualname__}() at {frame.f_code.co_filename}:{frame.f_lineno}"
+
+
+def get_suspended_frames(task: asyncio.Task) -> list[traceback.FrameSummary]:
+    """Return the user frames where the coroutines of a task are suspended."""
+    return [
+        traceback.FrameSummary(
+            coro.cr_frame.f_code.co_filename,
+            coro.cr_frame.f_lineno,
+            coro.__qualname__,
+        )
+        for coro in get_coroutine_chain(task.get_coro())
+        if not is_internal_frame(coro.cr_frame.f_code.co_filename)
+    ]
+
+
+def is_internal_frame(filename: str) -> bool:
+    """Check whether a frame belongs to asyncio or to this module."""
+    return (
+        Path(filename).parent == ASYNCIO_DIR
+        or Path(filename) == Path(__file__)
+    )
+
+
+def write_profile_stats(
+    profiler: cProfile.Profile,
+    thread_profilers: list[cProfile.Profile],
+    output_dir: Path,
+) -> None:
+    """Dump the merged raw profile and a text report sorted by cumulative time."""
+    stats = pstats.Stats(profiler)
+    for thread_profiler in thread_profilers:
+        thread_profiler.create_stats()
+        stats.add(thread_profiler)
+
+    stats.dump_stats(output_dir / "profile.prof")
+
+    with (output_dir / "profile.txt").open("w", encoding="utf-8") as file:
+        stats.stream = file
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_STATS_LIMIT)
+
+
+async def profile_run(label: str, coro: Coroutine) -> object:
+    """Profile a coroutine and write the results to a per-run directory.
+
+    The coroutine runs in its own task, so that every one of its steps goes through the
+    slow callback monitor. Its result is returned.
+    """
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    output_dir = Path(PROFILES_FOLDER) / f"{label}_{timestamp}"
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    slow_callback_monitor = SlowCallbackMonitor()
+    slow_callback_monitor.install()
+    thread_profilers = ThreadProfilers()
+    thread_profilers.install()
+
+    lag_monitor = LoopLagMonitor()
+    lag_monitor.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    try:
+        return await asyncio.create_task(coro, name=f"{label}-profiled")
+
+    finally:
+        profiler.disable()
+        await lag_monitor.stop()
+        thread_profilers.uninstall()
+        slow_callback_monitor.uninstall()
+
+        write_profile_stats(profiler, thread_profilers.profilers, output_dir)
+        lag_monitor.write_report(output_dir / "loop_lag.csv")
+        slow_callback_monitor.write_report(output_dir / "slow_callbacks.log")
@@ -1,23 +1,176 @@
 """Module that provides utility functions for tracking download progress.
 
 It includes features for creating a progress bar and a formatted progress table
-specifically designed for monitoring the download status of the current taks.
+specifically designed for monitoring the download status of the current taks, as well
+as a headless backend that only prints periodic status lines for batch and server runs.
 """
 
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from typing import TYPE_CHECKING, TextIO
+
+from rich.console import Group
+from rich.live import Live
 from rich.panel import Panel
 from rich.progress import (
     BarColumn,
+    DownloadColumn,
     Progress,
     SpinnerColumn,
     TextColumn,
     TimeRemainingColumn,
+    TransferSpeedColumn,
 )
 from rich.table import Table
+from rich.text import Text
+
+from .config import HEADLESS_STATUS_INTERVAL, MB
+
+if TYPE_CHECKING:
+    from contextlib import AbstractContextManager
+    from types import TracebackType
+
+
+class TransferProgress(Progress):
+    """Rich progress bar that also tracks the downloaded bytes and throughput."""
+
+    def __init__(self, *columns: str | object, **kwargs: object) -> None:
+        """Initialize the progress bar and its byte transfer row."""
+        super().__init__(*columns, **kwargs)
+        self.transfer_progress = Progress(
+            "{task.description}",
+            DownloadColumn(binary_units=True),
+            "•",
+            TransferSpeedColumn(),
+        )
+        self.transfer_task = self.transfer_progress.add_task(
+            "[cyan]Downloaded", total=None,
+        )
+
+    def advance_bytes(self, count: int) -> None:
+        """Add the given number of bytes to the byte transfer row."""
+        self.transfer_progress.advance(self.transfer_task, count)
+
+
+class HeadlessProgress:
+    """Progress tracker with the same interface as `Progress` that draws nothing.
+
+    Counts are aggregated in-process and a compact status line is printed every
+    `status_interval` seconds by a timer task, even while no download makes progress.
+    An interval of zero disables all output.
+    """
+
+    def __init__(
+        self,
+        status_interval: float = HEADLESS_STATUS_INTERVAL,
+        stream: TextIO = sys.stdout,
+    ) -> None:
+        """Initialize the tracker with the given status interval and stream."""
+        self.status_interval = status_interval
+        self.stream = stream
+        self.title = ""
+        self.tasks: dict[int, dict] = {}
+        self.completed_bytes = 0
+        self._next_task_id = 0
+        self._start_time = time.monotonic()
+        self._last_emit_time = self._start_time
+        self._last_emit_bytes = 0
+        self._timer_task: asyncio.Task | None = None
+
+    def __enter__(self) -> HeadlessProgress:
+        """Reset the counters and start the status timer on the running loop."""
+        self._start_time = self._last_emit_time = time.monotonic()
+        self._last_emit_bytes = self.completed_bytes
+
+        if self.status_interval:
+            self._timer_task = asyncio.get_running_loop().create_task(
+                self._emit_periodically(), name="headless-status",
+            )
+        return self
 
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stop the status timer and print a final summary line."""
+        if self._timer_task is not None:
+            self._timer_task.cancel()
+            self._timer_task = None
 
-def create_progress_bar() -> Progress:
+        self._emit(final=True)
+
+    def add_task(self, description: str, total: float | None = None) -> int:
+        """Add a task and return its identifier."""
+        task_id = self._next_task_id
+        self._next_task_id += 1
+        self.tasks[task_id] = {
+            "description": Text.from_markup(description).plain,
+            "total": total,
+            "completed": 0,
+            "visible": True,
+        }
+        return task_id
+
+    def advance(self, task_id: int, advance: float = 1) -> None:
+        """Advance the completed count of a task."""
+        self.tasks[task_id]["completed"] += advance
+
+    def update(self, task_id: int, *, visible: bool | None = None) -> None:
+        """Update a task, hidden tasks are dropped to keep the status compact."""
+        if visible is False:
+            self.tasks.pop(task_id, None)
+
+    def advance_bytes(self, count: int) -> None:
+        """Add the given number of bytes to the byte counter."""
+        self.completed_bytes += count
+
+    async def _emit_periodically(self) -> None:
+        """Print a status line every status interval."""
+        while True:
+            await asyncio.sleep(self.status_interval)
+            self._emit()
+
+    def _emit(self, *, final: bool = False) -> None:
+        """Print a compact status line with task counts and throughput."""
+        if not self.status_interval:
+            return
+
+        now = time.monotonic()
+        since_time, since_bytes = (
+            (self._start_time, 0)
+            if final
+            else (self._last_emit_time, self._last_emit_bytes)
+        )
+        elapsed = max(now - since_time, 1e-9)
+        throughput = (self.completed_bytes - since_bytes) / elapsed / MB
+        self._last_emit_time = now
+        self._last_emit_bytes = self.completed_bytes
+
+        tasks_status = ", ".join(
+            f"{task['description']} {task['completed']:.0f}/{task['total'] or '?'}"
+            for task in self.tasks.values()
+        )
+        label = "done" if final else "status"
+        self.stream.write(
+            f"[{label}] {self.title} | {tasks_status} | "
+            f"{self.completed_bytes / MB:.1f} MB at {throughput:.2f} MB/s\n",
+        )
+        self.stream.flush()
+
+
+def create_progress_bar(
+    *, headless: bool = False, status_interval: float = HEADLESS_STATUS_INTERVAL,
+) -> TransferProgress | HeadlessProgress:
     """Create and returns a progress bar for tracking download progress."""
-    return Progress(
+    if headless:
+        return HeadlessProgress(status_interval)
+
+    return TransferProgress(
         "{task.description}",
         SpinnerColumn(),
         BarColumn(),
@@ -27,15 +180,27 @@ def create_progress_bar() -> Progress:
     )
 
 
-def create_progress_table(title: str, job_progress: Progress) -> Table:
+def create_progress_table(title: str, job_progress: TransferProgress) -> Table:
     """Create a formatted progress table for tracking the download status."""
     progress_table = Table.grid()
     progress_table.add_row(
         Panel.fit(
-            job_progress,
+            Group(job_progress, job_progress.transfer_progress),
             title=f"[b]{title}",
             border_style="red",
             padding=(1, 1),
         ),
     )
     return progress_table
+
+
+def create_progress_display(
+    title: str, job_progress: TransferProgress | HeadlessProgress,
+) -> AbstractContextManager:
+    """Create the context manager that renders the progress while downloading."""
+    if isinstance(job_progress, HeadlessProgress):
+        job_progress.title = title
+        return job_progress
+
+    progress_table = create_progress_table(title, job_progress)
+    return Live(progress_table, refresh_per_second=10)